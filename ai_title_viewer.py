@@ -15,14 +15,14 @@ import os
 import re
 import sys
 import time
-import subprocess
-import webbrowser
-import urllib.parse
+import queue
+import threading
 import configparser
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, simpledialog
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from tkinter import ttk, filedialog, messagebox
+from functools import lru_cache, partial
+from itertools import compress, islice
+from typing import Callable, List, Dict, Optional, Tuple
 
 APP_TITLE = "AI Title Viewer v27 - FINAL v5"
 APP_INI = "ai_title_viewer_main.ini"
@@ -37,6 +37,7 @@ DEFAULT_GENRES = [
     "映画",
     "資料",
 ]
+DEFAULT_GENRE_ORDER = {g: i for i, g in enumerate(DEFAULT_GENRES)}
 
 DEFAULT_ENGINES: Dict[str, str] = {
     "Perplexity": "https://www.perplexity.ai/search?q={}",
@@ -46,9 +47,43 @@ DEFAULT_ENGINES: Dict[str, str] = {
     "Wikipedia": "https://ja.wikipedia.org/w/index.php?search={}",
 }
 
-DIGITS_ONLY_RE = re.compile(r"^[0-9]+$")
+# Treeview の列ID -> App の列リスト名
+COLUMN_ATTRS = {"raw": "titles_raw", "key": "search_keys", "path": "paths"}
+# 本体 Treeview の列（ID, 見出し, 幅）。列は固定で、表示の切り替えは displaycolumns で行う
+TREE_COLUMNS = (
+    ("raw", "RAWタイトル", 420),
+    ("key", "検索キー（整形後）", 360),
+    ("path", "パス", 520),
+)
+
 SPACES_RE = re.compile(r"\s+")
-PUNCT_RE = re.compile(r"[!！?？,，.．・:：;；/／\\|｜~〜^＾`´'\"\[\]\(\)（）【】{}<>＜＞「」『』]")
+# 検索キーで空白に置き換える記号（str.translate 用の表）
+PUNCT_CHARS = "!！?？,，.．・:：;；/／\\|｜~〜^＾`´'\"[]()（）【】{}<>＜＞「」『』"
+PUNCT_TRANS = str.maketrans(dict.fromkeys(PUNCT_CHARS, " "))
+
+# フォルダ読み込み（別スレッド）: 1回に送る行数 / 受け取り間隔(ms) / 途中で表示を更新する間隔（バッチ数）
+LOAD_BATCH = 256
+LOAD_POLL_MS = 50
+LOAD_REFRESH_BATCHES = 40
+
+# AI用文章の固定部分（build_ai_prompt で可変部分と1回でつなぐ）
+PROMPT_INTRO = (
+    "あなたは正規表現の専門家です。次の『タイトル名のゴミ』を削除する正規表現ルール案を複数作ってください。\n"
+    "\n"
+    "【目的】\n"
+    "- ファイル名は変更せず、文字列からゴミだけを除去して検索・分類に使う。\n"
+    "- ルールは小さく分割し、ON/OFFしやすく。\n"
+    "- それぞれ『何を消すか』を短く説明する。\n"
+    "\n"
+)
+PROMPT_OUTPUT_FORMAT = (
+    "\n"
+    "【出力フォーマット】（ルールごと）\n"
+    "- name: ルール名\n"
+    "- pattern: 正規表現（1行）\n"
+    "- why: 何を消すか（日本語で簡潔）\n"
+    "- 注意: 誤爆しそうな例\n"
+)
 
 def app_dir() -> str:
     return os.path.dirname(os.path.abspath(__file__))
@@ -70,33 +105,29 @@ def load_engines(cfg: configparser.ConfigParser) -> Dict[str, str]:
         cfg["engines"] = {}
     engines = {}
     # Load saved
+    # configparser はキーを小文字化するので、表示名は normalize_engine_display_name で整える
     for k, v in cfg.items("engines"):
         name = k.strip()
         tpl = v.strip()
-        if not name or not tpl:
-            continue
-        # configparser lowercases keys by default; keep original-ish by title-casing if matches defaults
-        # We'll store display names separately in a list (see below). Here, just use as-is.
-        engines[name] = tpl
+        if name and tpl:
+            engines[name] = tpl
+
+    changed = False
     if not engines:
         # seed defaults
         engines = DEFAULT_ENGINES.copy()
-        cfg["engines"] = {k: v for k, v in engines.items()}
-        save_config(cfg)
+        changed = True
     else:
         # merge in defaults that are missing (non-destructive)
-        changed = False
+        lowered = {k.lower() for k in engines}
         for k, v in DEFAULT_ENGINES.items():
-            lk = k.lower()
-            if lk not in engines and k not in engines:
-                cfg["engines"][k] = v
+            if k.lower() not in lowered:
+                engines[k] = v
                 changed = True
-        if changed:
-            save_config(cfg)
-        # Reload to include newly added defaults
-        engines = {}
-        for k, v in cfg.items("engines"):
-            engines[k.strip()] = v.strip()
+
+    if changed:
+        cfg["engines"] = engines
+        save_config(cfg)
     return engines
 
 def normalize_engine_display_name(name: str) -> str:
@@ -108,17 +139,175 @@ def normalize_engine_display_name(name: str) -> str:
     # それ以外は先頭大文字
     return name[:1].upper() + name[1:] if name else name
 
+# 同じフォルダを読み直したときは計算済みの結果を使う
+@lru_cache(maxsize=65536)
 def build_search_key(title_raw: str) -> str:
-    s = (title_raw or "").strip().lower()
-    s = PUNCT_RE.sub(" ", s)
-    s = SPACES_RE.sub(" ", s).strip()
-    return s
+    s = (title_raw or "").lower().translate(PUNCT_TRANS)
+    # split() + join で連続空白をまとめ、前後の空白も落とす
+    return " ".join(s.split())
+
+def iter_files(folder: str):
+    """folder 以下のファイルの DirEntry を返す（os.walk と同じ順序・同じ扱い）
+
+    os.walk は DirEntry を捨てて名前だけ返すため、呼び出し側で join し直すことになる。
+    scandir を直接たどれば e.name / e.path をそのまま使える。
+    ディレクトリへのシンボリックリンクはたどらず、読めないフォルダは飛ばす。
+    """
+    try:
+        with os.scandir(folder) as it:
+            subdirs = []
+            for e in it:
+                try:
+                    is_dir = e.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    yield e
+                elif not e.is_symlink():
+                    subdirs.append(e.path)
+    except OSError:
+        return
+    for d in subdirs:
+        yield from iter_files(d)
+
+# 読み込みの1バッチ: (RAWタイトル, パス, 数字のみでないフラグ) の並列リスト
+# 検索キーは表示・検索で必要になった行だけ App.search_key で作る
+Batch = Tuple[List[str], List[str], bytearray]
+
+def _new_batch() -> Batch:
+    return [], [], bytearray()
+
+def scan_rows(folder: str, q: "queue.Queue", cancel: threading.Event) -> None:
+    """別スレッドで folder を走査し、LOAD_BATCH 件ずつ Batch を q に送る
+
+    最後に None を送る。cancel が立ったら途中でやめる（Tk には触らない）。
+    """
+    raws, paths, keep = batch = _new_batch()
+    splitext = os.path.splitext
+    try:
+        for e in iter_files(folder):
+            raw = splitext(e.name)[0]
+            raws.append(raw)
+            paths.append(e.path)
+            # isascii() で全角数字などを除外し、^[0-9]+$ と同じ判定にする
+            keep.append(not (raw.isascii() and raw.isdigit()))
+            if len(raws) >= LOAD_BATCH:
+                if cancel.is_set():
+                    return
+                q.put(batch)
+                raws, paths, keep = batch = _new_batch()
+        if raws:
+            q.put(batch)
+    finally:
+        q.put(None)
+
+class LazyTreeLoader:
+    """Treeview へ行を少しずつ入れる。
+
+    全件を一度に insert すると大きなフォルダで固まるので、最初は見える付近だけ入れ、
+    スクロールが末尾に近づいたら次の分を追加する（iid は行番号の文字列）。
+    入れ済みの行は index_of（iid -> 行番号）で引ける。
+    """
+    CHUNK = 200
+
+    def __init__(self, tree: ttk.Treeview):
+        self.tree = tree
+        self._indices: List[int] = []
+        self._values: Callable[[int], tuple] = lambda i: ()
+        self._pos = 0
+        self._pending = False
+        self.index_of: Dict[str, int] = {}
+        tree.configure(yscrollcommand=self._on_yscroll)
+
+    def set_rows(self, indices: List[int], values: Callable[[int], tuple]):
+        self.tree.delete(*self.tree.get_children())
+        self.index_of = {}
+        self._indices = indices
+        self._values = values
+        self._pos = 0
+        self._load_more()
+
+    def set_values(self, values: Callable[[int], tuple]):
+        # 行の並びはそのままで、値だけ入れ替える（入れ済みの行は item で更新）
+        self._values = values
+        item = self.tree.item
+        for iid, i in self.index_of.items():
+            item(iid, values=values(i))
+
+    def extend_rows(self, indices: List[int]):
+        """indices は今の並びの後ろに行を足したもの。入れ済みの行・選択・スクロール位置には触らない"""
+        self._indices = indices
+        # まだ画面が埋まっていない / 末尾付近を見ているときだけ、続きをすぐ入れる
+        if not self._pending and self._pos < len(indices) and self.tree.yview()[1] >= 0.9:
+            self._load_more()
+
+    def _load_more(self):
+        self._pending = False
+        end = min(self._pos + self.CHUNK, len(self._indices))
+        insert = self.tree.insert
+        values = self._values
+        index_of = self.index_of
+        for i in self._indices[self._pos:end]:
+            iid = str(i)
+            index_of[iid] = i
+            insert("", "end", iid=iid, values=values(i))
+        self._pos = end
+
+    def _on_yscroll(self, first, last):
+        # 表示位置が読み込み済みの末尾付近に来たら続きを入れる
+        if self._pending or self._pos >= len(self._indices):
+            return
+        if float(last) >= 0.9:
+            self._pending = True
+            self.tree.after_idle(self._load_more)
+
+class NameTplDialog(tk.Toplevel):
+    """表示名とURLテンプレートを1つの窓でまとめて入力する"""
 
-@dataclass
-class Row:
-    title_raw: str
-    search_key: str
-    path: str
+    def __init__(self, parent: tk.Misc, title: str, init_name: str = "", init_tpl: str = ""):
+        super().__init__(parent)
+        self.title(title)
+        self.transient(parent)
+        self.resizable(True, False)
+        self.result: Optional[Tuple[str, str]] = None
+
+        frm = ttk.Frame(self)
+        frm.pack(fill="both", expand=True, padx=12, pady=12)
+        frm.columnconfigure(0, weight=1)
+
+        self.name_var = tk.StringVar(value=init_name)
+        self.tpl_var = tk.StringVar(value=init_tpl)
+        ttk.Label(frm, text="表示名（例: DuckDuckGo）").grid(row=0, column=0, sticky="w")
+        name_entry = ttk.Entry(frm, textvariable=self.name_var, width=56)
+        name_entry.grid(row=1, column=0, sticky="we", pady=(2, 8))
+        ttk.Label(frm, text="URLテンプレート（{} を含む）").grid(row=2, column=0, sticky="w")
+        ttk.Entry(frm, textvariable=self.tpl_var, width=56).grid(row=3, column=0, sticky="we", pady=(2, 10))
+
+        btns = ttk.Frame(frm)
+        btns.grid(row=4, column=0, sticky="e")
+        ttk.Button(btns, text="キャンセル", command=self.destroy).pack(side="right")
+        ttk.Button(btns, text="OK", command=self.on_ok).pack(side="right", padx=8)
+
+        self.bind("<Return>", lambda e: self.on_ok())
+        self.bind("<Escape>", lambda e: self.destroy())
+        name_entry.focus_set()
+        self.grab_set()
+
+    def on_ok(self):
+        name = self.name_var.get().strip()
+        tpl = self.tpl_var.get().strip()
+        if not name:
+            messagebox.showerror("エラー", "名前が空です。", parent=self)
+            return
+        if tpl.count("{}") != 1:
+            messagebox.showerror("エラー", "{} を1つだけ含むURLテンプレートにしてください。", parent=self)
+            return
+        self.result = (name, tpl)
+        self.destroy()
+
+    def show(self) -> Optional[Tuple[str, str]]:
+        self.wait_window()
+        return self.result
 
 class EngineEditor(tk.Toplevel):
     def __init__(self, app: "App"):
@@ -173,12 +362,11 @@ class EngineEditor(tk.Toplevel):
         ttk.Button(btns, text="閉じる", command=self.close).pack(side="right")
 
     def refresh(self):
+        names = self.app.engine_names()
         self.lb.delete(0, "end")
-        for name in self.app.engine_names():
-            self.lb.insert("end", name)
+        self.lb.insert("end", *names)
         # select current default if present
         cur = self.app.engine_var.get()
-        names = self.app.engine_names()
         if cur in names:
             idx = names.index(cur)
             self.lb.selection_set(idx)
@@ -200,22 +388,7 @@ class EngineEditor(tk.Toplevel):
         self.sel_tpl.set(tpl)
 
     def _ask_name_tpl(self, title: str, init_name: str = "", init_tpl: str = "") -> Optional[Tuple[str, str]]:
-        name = simpledialog.askstring(title, "表示名（例: DuckDuckGo）", initialvalue=init_name, parent=self)
-        if name is None:
-            return None
-        name = name.strip()
-        if not name:
-            messagebox.showerror("エラー", "名前が空です。", parent=self)
-            return None
-
-        tpl = simpledialog.askstring(title, "URLテンプレート（{} を含む）", initialvalue=init_tpl, parent=self)
-        if tpl is None:
-            return None
-        tpl = tpl.strip()
-        if tpl.count("{}") != 1:
-            messagebox.showerror("エラー", "{} を1つだけ含むURLテンプレートにしてください。", parent=self)
-            return None
-        return name, tpl
+        return NameTplDialog(self, title, init_name, init_tpl).show()
 
     def add_engine(self):
         res = self._ask_name_tpl("追加")
@@ -226,6 +399,7 @@ class EngineEditor(tk.Toplevel):
             messagebox.showerror("エラー", "同じ名前が既にあります。", parent=self)
             return
         self.app.engines[name] = tpl
+        self.app.invalidate_engine_names()
         self.app.persist_engines()
         self.app.rebuild_engine_ui()
         self.refresh()
@@ -248,6 +422,7 @@ class EngineEditor(tk.Toplevel):
         # apply
         del self.app.engines[old]
         self.app.engines[name] = tpl
+        self.app.invalidate_engine_names()
 
         # update default selection if needed
         if self.app.engine_var.get() == old:
@@ -268,6 +443,7 @@ class EngineEditor(tk.Toplevel):
         if not messagebox.askyesno("確認", f"「{name}」を削除しますか？", parent=self):
             return
         del self.app.engines[name]
+        self.app.invalidate_engine_names()
         if self.app.engine_var.get() == name:
             self.app.engine_var.set(self.app.engine_names()[0])
         self.app.persist_engines()
@@ -278,6 +454,7 @@ class EngineEditor(tk.Toplevel):
         if not messagebox.askyesno("確認", "検索エンジン設定を既定に戻しますか？", parent=self):
             return
         self.app.engines = DEFAULT_ENGINES.copy()
+        self.app.invalidate_engine_names()
         self.app.persist_engines(reset=True)
         self.app.rebuild_engine_ui()
         self.refresh()
@@ -303,8 +480,11 @@ class MaterialsWindow(tk.Toplevel):
         self.transient(app)
 
         self.left_mode = tk.StringVar(value="RAW")  # RAW / KEY
+        self._refresh_pending = False
+        self._dirty = False  # 本体の絞り込みが変わったが、まだ反映していない
         self._build_ui()
         self.refresh_all()
+        self.bind("<FocusIn>", self._on_focus_in)
 
     def _build_ui(self):
         top = ttk.Frame(self)
@@ -344,6 +524,7 @@ class MaterialsWindow(tk.Toplevel):
         self.tree.column("t", width=560, anchor="w", stretch=True)
         self.tree.column("p", width=480, anchor="w", stretch=True)
         self.tree.pack(fill="both", expand=True)
+        self.left_loader = LazyTreeLoader(self.tree)
 
         # --- NEW: 1行テキスト欄（ドラッグで語句選択） ---
         hint = ttk.Label(left, text="選択したタイトル（ドラッグで語句を拾えます）")
@@ -437,13 +618,12 @@ class MaterialsWindow(tk.Toplevel):
         if not sel:
             self._set_pick_text("")
             return
-        iid = sel[0]
+        get = self.app.column_getter("raw" if self.left_mode.get() == "RAW" else "key")
         try:
-            r = self.app.rows[int(iid)]
-        except Exception:
+            s = get(self.left_loader.index_of[sel[0]])
+        except (KeyError, IndexError):
             self._set_pick_text("")
             return
-        s = r.title_raw if self.left_mode.get() == "RAW" else r.search_key
         self._set_pick_text(s)
 
     def _add_ignore_tokens(self, text: str):
@@ -451,11 +631,12 @@ class MaterialsWindow(tk.Toplevel):
         text = (text or "").strip()
         if not text:
             return 0
-        tokens = [t.strip() for t in re.split(r"\s+", text) if t.strip()]
+        # SPACES_RE（\s+）はコンパイル済みなのでそのまま分割に使う
+        tokens = [t for t in SPACES_RE.split(text) if t]
         added = 0
         for t in tokens:
             if t not in self.app.ignore_words:
-                self.app.ignore_words.append(t)
+                self.app.ignore_words[t] = None
                 added += 1
         return added
 
@@ -487,14 +668,12 @@ class MaterialsWindow(tk.Toplevel):
         self.refresh_counts()
 
     def refresh_left(self):
-        for c in self.tree.get_children():
-            self.tree.delete(c)
-        mode = self.left_mode.get()
-        for i, r in enumerate(self.app.rows):
-            if self.app.hide_digits.get() and DIGITS_ONLY_RE.match(r.title_raw):
-                continue
-            title = r.title_raw if mode == "RAW" else r.search_key
-            self.tree.insert("", "end", iid=str(i), values=(title, r.path))
+        # 絞り込み条件は本体と同じなので、本体の絞り込み結果をそのまま使う
+        title = self.app.column_getter("raw" if self.left_mode.get() == "RAW" else "key")
+        paths = self.app.paths
+
+        # 見える付近だけ先に入れる（残りはスクロールに合わせて追加）
+        self.left_loader.set_rows(self.app.filtered, lambda i: (title(i), paths[i]))
 
         # 再描画後に選択行があればテキストも追従
         kids = self.tree.get_children()
@@ -505,10 +684,8 @@ class MaterialsWindow(tk.Toplevel):
     def refresh_right(self):
         self.ex_list.delete(0, "end")
         self.keep_list.delete(0, "end")
-        for t in self.app.material_ex:
-            self.ex_list.insert("end", t)
-        for t in self.app.material_keep:
-            self.keep_list.insert("end", t)
+        self.ex_list.insert("end", *self.app.material_ex)
+        self.keep_list.insert("end", *self.app.material_keep)
 
     def refresh_counts(self):
         ex_n = len(self.app.material_ex)
@@ -532,66 +709,86 @@ class MaterialsWindow(tk.Toplevel):
         self.refresh_counts()
         self.update_pick_text()
 
-    def selected_rows(self) -> List[Row]:
+    def schedule_refresh(self):
+        # 連続した更新要求は次のアイドル時に1回へまとめる
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        self.after_idle(self._do_refresh)
+
+    def mark_dirty(self):
+        # 本体側の変化は印だけ付け、この窓に戻ったときにまとめて反映する
+        self._dirty = True
+        try:
+            focus = self.focus_get()
+        except KeyError:
+            focus = None
+        if focus is not None and focus.winfo_toplevel() is self:
+            self._on_focus_in()  # この窓を操作中（読み込み中など）はすぐ反映
+
+    def _on_focus_in(self, _e=None):
+        if self._dirty:
+            self._dirty = False
+            self.schedule_refresh()
+
+    def _do_refresh(self):
+        self._refresh_pending = False
+        self.refresh_all()
+
+    def selected_titles(self) -> List[str]:
+        titles = self.app.titles_raw
+        index_of = self.left_loader.index_of
         out = []
         for iid in self.tree.selection():
             try:
-                out.append(self.app.rows[int(iid)])
-            except Exception:
+                out.append(titles[index_of[iid]])
+            except (KeyError, IndexError):
                 pass
         return out
 
     def add_to_ex(self):
-        rows = self.selected_rows()
-        if not rows:
+        titles = self.selected_titles()
+        if not titles:
             messagebox.showinfo("材料", "左の一覧から行を選択してください。")
             return
-        for r in rows:
-            t = r.title_raw
-            if t not in self.app.material_ex:
-                self.app.material_ex.append(t)
-            if t in self.app.material_keep:
-                self.app.material_keep.remove(t)
-        self.refresh_all()
+        for t in titles:
+            self.app.material_ex[t] = None
+            self.app.material_keep.pop(t, None)
+        self.schedule_refresh()
 
     def add_to_keep(self):
-        rows = self.selected_rows()
-        if not rows:
+        titles = self.selected_titles()
+        if not titles:
             messagebox.showinfo("材料", "左の一覧から行を選択してください。")
             return
-        for r in rows:
-            t = r.title_raw
-            if t not in self.app.material_keep:
-                self.app.material_keep.append(t)
-            if t in self.app.material_ex:
-                self.app.material_ex.remove(t)
-        self.refresh_all()
+        for t in titles:
+            self.app.material_keep[t] = None
+            self.app.material_ex.pop(t, None)
+        self.schedule_refresh()
 
-    def delete_selected(self, lb: tk.Listbox, backing: List[str]):
+    def delete_selected(self, lb: tk.Listbox, backing: Dict[str, None]):
         sel = lb.curselection()
         if not sel:
             return
-        idx = sel[0]
-        try:
-            backing.pop(idx)
-        except Exception:
-            pass
-        self.refresh_all()
+        backing.pop(lb.get(sel[0]), None)
+        self.schedule_refresh()
 
     def clear_materials(self):
         if not messagebox.askyesno("確認", "ノイズあり/ノイズなし の材料をすべてクリアしますか？"):
             return
         self.app.material_ex.clear()
         self.app.material_keep.clear()
-        self.refresh_all()
+        self.schedule_refresh()
 
     def copy_ai_prompt(self):
-        if not self.app.rows:
+        if not self.app.titles_raw:
             messagebox.showinfo("AI", "先にフォルダを読み込んでください。")
             return
         prompt = self.app.build_ai_prompt()
         self.clipboard_clear()
         self.clipboard_append(prompt)
+        # クリップボードを確定させる
+        self.update()
         messagebox.showinfo("コピー", "ブラウザのAIへ貼り付けてください。\\n生成結果は工房へ貼り付けて育てます。")
 
 
@@ -599,18 +796,13 @@ class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.cfg = load_config()
+        self._cfg_dirty = False  # 起動時の既定値投入を最後にまとめて保存する
         self.engines = {normalize_engine_display_name(k): v for k, v in load_engines(self.cfg).items()}
         self.genres = self.load_genres_from_cfg()
         self.genre_var = tk.StringVar(value=self.cfg.get("app", "genre", fallback="（無選択）"))
         if self.genre_var.get() not in (["（無選択）"] + self.genres):
             self.genre_var.set("（無選択）")
 
-        # --- genres ---
-        self.genres = self.load_genres_from_cfg()
-        self.genre_var = tk.StringVar(value=self.cfg.get("app", "genre", fallback="（無選択）"))
-        if self.genre_var.get() not in (["（無選択）"] + self.genres):
-            self.genre_var.set("（無選択）")
-
         # default engine
         default_engine = self.cfg.get("app", "default_engine", fallback="Perplexity")
         default_engine = normalize_engine_display_name(default_engine)
@@ -621,8 +813,14 @@ class App(tk.Tk):
         self.geometry("1200x820")
         self.minsize(1020, 700)
 
-        self.rows: List[Row] = []
+        # 行データは列ごとの並列リストで持つ（行番号 i で各列を引く）
+        self.titles_raw: List[str] = []
+        self.search_keys: List[Optional[str]] = []  # 未計算は None（search_key(i) で埋める）
+        self.paths: List[str] = []
         self.filtered: List[int] = []
+        # 行ごとの「数字のみでない」フラグ（1/0）。数字のみ非表示の絞り込みに使う
+        self._keep_mask = bytearray()
+        self._filtered_upto = 0  # filtered に反映済みの行数（titles_raw の先頭から）
 
         self.engine_var = tk.StringVar(value=default_engine)
         self.hide_digits = tk.BooleanVar(value=True)
@@ -630,24 +828,64 @@ class App(tk.Tk):
         self.show_raw = tk.BooleanVar(value=True)
         self.show_key = tk.BooleanVar(value=False)
         self.show_path = tk.BooleanVar(value=True)
+        self._key_shown = False  # 本体の行に検索キーを入れているか（rebuild_columns で更新）
 
         self.search_mode = tk.StringVar(value="RAW")  # RAW / KEY
 
-        self.material_ex: List[str] = []
-        self.material_keep: List[str] = []
-        self.ignore_words: List[str] = []
+        # 順序付きの集合として dict を使う（値は常に None）
+        self.material_ex: Dict[str, None] = {}
+        self.material_keep: Dict[str, None] = {}
+        self.ignore_words: Dict[str, None] = {}
 
         self.material_win: Optional[MaterialsWindow] = None
         self.workshop_path: Optional[str] = None
 
+        self._engine_names_cache: Optional[Tuple[str, ...]] = None
+
+        # 最後に ini へ書いた内容（同じなら書き込みを省く）
+        self._persisted_sig: Optional[tuple] = None
+        self._persisted_genres_sig: Optional[tuple] = None
+
+        # AI用文章の行キャッシュ（行番号 -> "- タイトル\n"）。読み込み時に破棄
+        self._prompt_cache: Dict[int, str] = {}
+        # 直前に作った AI用文章（入力の鍵, 作成日時より前, 作成日時より後）
+        self._prompt_memo: Optional[Tuple[tuple, str, str]] = None
+
+        # 読み込みの世代番号と中断フラグ（読み直したら古い結果は捨てる）
+        self._load_gen = 0
+        self._load_cancel: Optional[threading.Event] = None
+
+        # 最後に描画した (読み込みの世代, 絞り込み結果)
+        self._render_key: Optional[tuple] = None
+
+        # _schedule で予約中の after ID（関数ごと）
+        self._pending_after: Dict[Callable, str] = {}
+
         self._build_ui()
         self.rebuild_columns()
+        self._initial_persist()
+
+    def _initial_persist(self):
+        if self._cfg_dirty:
+            save_config(self.cfg)
+            self._cfg_dirty = False
 
     # ---------- engines persistence ----------
-    def engine_names(self) -> List[str]:
-        return list(self.engines.keys())
+    def engine_names(self) -> Tuple[str, ...]:
+        if self._engine_names_cache is None:
+            self._engine_names_cache = tuple(self.engines.keys())
+        return self._engine_names_cache
+
+    def invalidate_engine_names(self):
+        # self.engines を書き換えたら呼ぶ
+        self._engine_names_cache = None
 
     def persist_engines(self, reset: bool = False):
+        genre = self.genre_var.get() if hasattr(self, "genre_var") else None
+        sig = (tuple(self.engines.items()), self.engine_var.get(), genre)
+        if sig == self._persisted_sig:
+            return
+        self.invalidate_engine_names()
         if not self.cfg.has_section("engines"):
             self.cfg["engines"] = {}
         if reset:
@@ -660,36 +898,34 @@ class App(tk.Tk):
         if not self.cfg.has_section("app"):
             self.cfg["app"] = {}
         self.cfg["app"]["default_engine"] = self.engine_var.get()
-        if hasattr(self, "genre_var"):
-            self.cfg["app"]["genre"] = self.genre_var.get()
+        if genre is not None:
+            self.cfg["app"]["genre"] = genre
         save_config(self.cfg)
+        self._persisted_sig = sig
 
     def rebuild_engine_ui(self):
-        # update optionmenu
+        # update combobox（values の差し替えは1回で済む）
         names = self.engine_names()
         if self.engine_var.get() not in names and names:
             self.engine_var.set(names[0])
+        self.engine_option["values"] = names
 
-        menu = self.engine_option["menu"]
-        menu.delete(0, "end")
-        for n in names:
-            menu.add_command(label=n, command=lambda v=n: self._set_engine(v))
-
-        # rebuild right-click menu
-        self.menu.delete(0, "end")
-        self.menu.add_command(label="AI検索（デフォルト）", command=self.ai_search)
-        self.menu.add_separator()
-        for name in names:
-            self.menu.add_command(label=f"{name}で検索", command=lambda n=name: self.ai_search(engine=n))
+        # rebuild right-click menu（エンジン名が変わったときだけ。新しく作ってから差し替える）
+        if names != self._menu_engines_sig:
+            old_menu = self.menu
+            self.menu = self._build_search_menu(names)
+            self._menu_engines_sig = names
+            old_menu.destroy()
 
         self.persist_engines()
         self.update_status()
 
     # ---------- genres persistence ----------
-    def load_genres_from_cfg(self) -> List[str]:
+    def load_genres_from_cfg(self, persist: bool = False) -> List[str]:
+        seeded = False
         if not self.cfg.has_section("genres"):
             self.cfg["genres"] = {g: "1" for g in DEFAULT_GENRES}
-            save_config(self.cfg)
+            seeded = True
 
         genres = []
         for k, _v in self.cfg.items("genres"):
@@ -700,13 +936,21 @@ class App(tk.Tk):
         if not genres:
             genres = DEFAULT_GENRES[:]
             self.cfg["genres"] = {g: "1" for g in genres}
-            save_config(self.cfg)
+            seeded = True
+
+        if seeded:
+            if persist:
+                save_config(self.cfg)
+            else:
+                self._cfg_dirty = True
 
-        order = {g: i for i, g in enumerate(DEFAULT_GENRES)}
-        genres.sort(key=lambda x: order.get(x, 999))
+        genres.sort(key=lambda x: DEFAULT_GENRE_ORDER.get(x, 999))
         return genres
 
     def persist_genres_to_cfg(self):
+        sig = (tuple(self.genres), self.genre_var.get())
+        if sig == self._persisted_genres_sig:
+            return
         # rewrite [genres]
         if self.cfg.has_section("genres"):
             self.cfg.remove_section("genres")
@@ -715,6 +959,7 @@ class App(tk.Tk):
             self.cfg["app"] = {}
         self.cfg["app"]["genre"] = self.genre_var.get()
         save_config(self.cfg)
+        self._persisted_genres_sig = sig
 
     def _set_genre(self, g: str):
         self.genre_var.set(g)
@@ -736,18 +981,17 @@ class App(tk.Tk):
 
         lb = tk.Listbox(frm, height=12)
         lb.pack(fill="both", expand=True, pady=(8, 8))
-        for g in self.genres:
-            lb.insert("end", g)
+        lb.insert("end", *self.genres)
 
         btns = ttk.Frame(frm)
         btns.pack(fill="x")
 
         def refresh_lb():
             lb.delete(0, "end")
-            for gg in self.genres:
-                lb.insert("end", gg)
+            lb.insert("end", *self.genres)
 
         def add_genre():
+            from tkinter import simpledialog
             name = simpledialog.askstring("追加", "ジャンル名", parent=win)
             if name is None:
                 return
@@ -762,6 +1006,7 @@ class App(tk.Tk):
             if not sel:
                 return
             old = lb.get(sel[0])
+            from tkinter import simpledialog
             name = simpledialog.askstring("変更", "ジャンル名", initialvalue=old, parent=win)
             if name is None:
                 return
@@ -842,8 +1087,9 @@ class App(tk.Tk):
         ttk.Button(top, text="読み込み", command=self.load).pack(side="left", padx=6)
 
         ttk.Label(top, text="検索エンジン:").pack(side="left", padx=(20, 4))
-        self.engine_option = ttk.OptionMenu(top, self.engine_var, self.engine_var.get(), *self.engine_names(), command=lambda _: self.persist_engines())
+        self.engine_option = ttk.Combobox(top, textvariable=self.engine_var, values=self.engine_names(), state="readonly", width=14)
         self.engine_option.pack(side="left")
+        self.engine_option.bind("<<ComboboxSelected>>", lambda e: self._set_engine(self.engine_var.get()))
 
         ttk.Button(top, text="エンジン編集", command=self.open_engine_editor).pack(side="left", padx=8)
 
@@ -859,12 +1105,12 @@ class App(tk.Tk):
 
         r0 = ttk.Frame(opt)
         r0.pack(fill="x", padx=10, pady=(8, 4))
-        ttk.Checkbutton(r0, text="数字のみのタイトルを非表示", variable=self.hide_digits, command=self.apply_filter).pack(side="left")
+        ttk.Checkbutton(r0, text="数字のみのタイトルを非表示", variable=self.hide_digits, command=lambda: self._schedule(self.apply_filter, 50)).pack(side="left")
 
         ttk.Separator(r0, orient="vertical").pack(side="left", fill="y", padx=10)
         ttk.Label(r0, text="AI検索に使う語句:").pack(side="left")
-        ttk.Radiobutton(r0, text="RAW", value="RAW", variable=self.search_mode, command=self.update_search_preview).pack(side="left", padx=6)
-        ttk.Radiobutton(r0, text="検索キー", value="KEY", variable=self.search_mode, command=self.update_search_preview).pack(side="left")
+        ttk.Radiobutton(r0, text="RAW", value="RAW", variable=self.search_mode, command=lambda: self._schedule(self.update_search_preview)).pack(side="left", padx=6)
+        ttk.Radiobutton(r0, text="検索キー", value="KEY", variable=self.search_mode, command=lambda: self._schedule(self.update_search_preview)).pack(side="left")
 
         r1 = ttk.Frame(opt)
         r1.pack(fill="x", padx=10, pady=(0, 8))
@@ -894,19 +1140,42 @@ class App(tk.Tk):
         mid.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         self.tree = ttk.Treeview(mid, show="headings", height=18)
         self.tree.pack(fill="both", expand=True)
-        self.tree.bind("<ButtonRelease-1>", lambda e: self.update_search_preview())
-        self.tree.bind("<<TreeviewSelect>>", lambda e: self.update_search_preview())
+        self.tree["columns"] = [c[0] for c in TREE_COLUMNS]
+        for cid, text, width in TREE_COLUMNS:
+            self.tree.heading(cid, text=text)
+            self.tree.column(cid, width=width, anchor="w", stretch=True)
+        self.tree_loader = LazyTreeLoader(self.tree)
+        # クリック1回で両方のイベントが来るので、まとめて1回だけ更新する
+        self.tree.bind("<ButtonRelease-1>", lambda e: self._schedule(self.update_search_preview))
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._schedule(self.update_search_preview))
         self.tree.bind("<Button-3>", self._popup_menu)
 
-        self.menu = tk.Menu(self, tearoff=False)
-        self.menu.add_command(label="AI検索（デフォルト）", command=self.ai_search)
-        self.menu.add_separator()
-        for name in self.engine_names():
-            self.menu.add_command(label=f"{name}で検索", command=lambda n=name: self.ai_search(engine=n))
+        self._menu_engines_sig = self.engine_names()
+        self.menu = self._build_search_menu(self._menu_engines_sig)
 
         self.status_var = tk.StringVar(value="未読み込み")
         ttk.Label(self, textvariable=self.status_var).pack(anchor="w", padx=10, pady=(0, 8))
 
+    def _build_search_menu(self, names) -> tk.Menu:
+        menu = tk.Menu(self, tearoff=False)
+        menu.add_command(label="AI検索（デフォルト）", command=self.ai_search)
+        menu.add_separator()
+        for name in names:
+            menu.add_command(label=f"{name}で検索", command=partial(self.ai_search, engine=name))
+        return menu
+
+    def _schedule(self, fn: Callable[[], None], ms: int = 30):
+        # 短時間に続いた呼び出しは最後の1回だけ実行する
+        pending = self._pending_after.pop(fn, None)
+        if pending is not None:
+            self.after_cancel(pending)
+
+        def run():
+            self._pending_after.pop(fn, None)
+            fn()
+
+        self._pending_after[fn] = self.after(ms, run)
+
     def open_engine_editor(self):
         EngineEditor(self)
 
@@ -921,83 +1190,159 @@ class App(tk.Tk):
         if not os.path.isdir(folder):
             messagebox.showerror("エラー", "フォルダを選択してください")
             return
-        self.rows.clear()
-        for root, _, files in os.walk(folder):
-            for f in files:
-                raw, _ = os.path.splitext(f)
-                self.rows.append(Row(raw, build_search_key(raw), os.path.join(root, f)))
+        if self._load_cancel is not None:
+            self._load_cancel.set()
+        self._load_gen += 1
+        self._load_cancel = cancel = threading.Event()
+
+        self.titles_raw.clear()
+        self.search_keys.clear()
+        self.paths.clear()
+        self._keep_mask.clear()
+        self._prompt_cache.clear()
         self.apply_filter()
+        if self.material_win and self.material_win.winfo_exists():
+            # 行データを空にしたので、前の行番号を持つ材料窓の一覧は印を待たずに作り直す
+            self.material_win.refresh_all()
+
+        # 走査は別スレッドで行い、画面は止めない
+        q: "queue.Queue" = queue.Queue()
+        threading.Thread(target=scan_rows, args=(folder, q, cancel), daemon=True).start()
+        self.after(LOAD_POLL_MS, self._drain_load, q, self._load_gen, 0)
+
+    def _drain_load(self, q: "queue.Queue", gen: int, batches: int):
+        if gen != self._load_gen:
+            return  # 新しい読み込みが始まった
+        done = False
+        got = 0
+        while True:
+            try:
+                batch = q.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                done = True
+                break
+            raws, paths, keep = batch
+            self.titles_raw.extend(raws)
+            self.search_keys.extend([None] * len(raws))
+            self.paths.extend(paths)
+            self._keep_mask.extend(keep)
+            got += 1
+
+        if done:
+            self._append_loaded()
+            return
+        if got:
+            # 最初の分はすぐ見せ、以降は数バッチごとにまとめて一覧の後ろへ足す
+            # （作り直さないので、読み込み中でも選択やスクロール位置はそのまま）
+            if batches == 0 or (batches + got) // LOAD_REFRESH_BATCHES != batches // LOAD_REFRESH_BATCHES:
+                self._append_loaded()
+            else:
+                self.status_var.set(f"読み込み中… {len(self.titles_raw)} 件")
+            batches += got
+        self.after(LOAD_POLL_MS, self._drain_load, q, gen, batches)
+
+    def _filter_range(self, start: int, end: int) -> List[int]:
+        rng = range(start, end)
+        if self.hide_digits.get():
+            # 読み込み時に作ったマスクで選ぶだけ（行ごとの属性参照も正規表現もない）
+            return list(compress(rng, self._keep_mask[start:end]))
+        return list(rng)
 
     def apply_filter(self):
-        self.filtered.clear()
-        for i, r in enumerate(self.rows):
-            if self.hide_digits.get() and DIGITS_ONLY_RE.match(r.title_raw):
-                continue
-            self.filtered.append(i)
+        # リストは作り直す（材料窓は反映するまで前の結果を持ち続けるため、書き換えない）
+        self._filtered_upto = len(self.titles_raw)
+        self.filtered = self._filter_range(0, self._filtered_upto)
         self.render()
         self.update_search_preview()
         self.update_status()
         if self.material_win and self.material_win.winfo_exists():
-            self.material_win.refresh_all()
+            self.material_win.mark_dirty()
+
+    def _append_loaded(self):
+        # 読み込み中に増えた行だけ絞り込んで、一覧の後ろへ足す（表示中の行は作り直さない）
+        start, end = self._filtered_upto, len(self.titles_raw)
+        self._filtered_upto = end
+        added = self._filter_range(start, end)
+        if added:
+            self.filtered = self.filtered + added  # 材料窓が持つ前のリストは書き換えない
+            self._render_key = (self._load_gen, self.filtered)
+            self.tree_loader.extend_rows(self.filtered)
+            if not self.tree.selection():
+                kids = self.tree.get_children()
+                if kids:
+                    self.tree.selection_set(kids[0])
+                    self.update_search_preview()
+            if self.material_win and self.material_win.winfo_exists():
+                self.material_win.mark_dirty()
+        self.update_status()
 
     def rebuild_columns(self):
         if (not self.show_raw.get()) and (not self.show_key.get()):
             self.show_raw.set(True)
 
-        cols = []
-        if self.show_raw.get():
-            cols.append(("raw", "RAWタイトル", 420))
-        if self.show_key.get():
-            cols.append(("key", "検索キー（整形後）", 360))
-        if self.show_path.get():
-            cols.append(("path", "パス", 520))
-
-        self.tree["columns"] = [c[0] for c in cols]
-        for cid, text, width in cols:
-            self.tree.heading(cid, text=text)
-            self.tree.column(cid, width=width, anchor="w", stretch=True)
+        shown = {"raw": self.show_raw.get(), "key": self.show_key.get(), "path": self.show_path.get()}
+        # 列そのものは変えず、見せる列だけ切り替える（行には触らない）
+        self.tree.configure(displaycolumns=[cid for cid, _, _ in TREE_COLUMNS if shown[cid]])
 
-        self.render()
+        # 検索キーは見えているときだけ値に入れるので、出し入れが変わったときだけ入れ済みの行を差し替える
+        if shown["key"] != self._key_shown:
+            self._key_shown = shown["key"]
+            self.tree_loader.set_values(self._row_values())
         self.update_search_preview()
         self.update_status()
 
+    def search_key(self, i: int) -> str:
+        # 検索キーは初めて使うときに作って残す
+        k = self.search_keys[i]
+        if k is None:
+            k = self.search_keys[i] = build_search_key(self.titles_raw[i])
+        return k
+
+    def column_getter(self, col: str) -> Callable[[int], str]:
+        # 列ID -> 行番号から値を返す関数
+        if col == "key":
+            return self.search_key
+        return getattr(self, COLUMN_ATTRS[col]).__getitem__
+
+    def _row_values(self) -> Callable[[int], tuple]:
+        # TREE_COLUMNS の順に値を返す。隠れている検索キー列は作らずに空にしておく
+        titles = self.titles_raw
+        paths = self.paths
+        if self._key_shown:
+            key = self.search_key
+            return lambda i: (titles[i], key(i), paths[i])
+        return lambda i: (titles[i], "", paths[i])
+
     def render(self):
-        for c in self.tree.get_children():
-            self.tree.delete(c)
-
-        cols = self.tree["columns"]
-        for i in self.filtered:
-            r = self.rows[i]
-            vals = []
-            for cid in cols:
-                if cid == "raw":
-                    vals.append(r.title_raw)
-                elif cid == "key":
-                    vals.append(r.search_key)
-                elif cid == "path":
-                    vals.append(r.path)
-                else:
-                    vals.append("")
-            self.tree.insert("", "end", iid=str(i), values=tuple(vals))
+        # 同じ読み込み・同じ絞り込み結果なら作り直さない（選択・スクロールもそのまま）
+        # 列の表示切り替えは rebuild_columns が行を作り直さずに反映する
+        key = (self._load_gen, self.filtered)
+        if key == self._render_key:
+            return
+        self._render_key = key
+
+        # 見える付近だけ先に入れる（残りはスクロールに合わせて追加）
+        self.tree_loader.set_rows(self.filtered, self._row_values())
 
         kids = self.tree.get_children()
         if kids and not self.tree.selection():
             self.tree.selection_set(kids[0])
 
-    def selected_row(self) -> Optional[Row]:
+    def selected_index(self) -> Optional[int]:
         sel = self.tree.selection()
         if not sel:
             return None
-        try:
-            return self.rows[int(sel[0])]
-        except Exception:
-            return None
+        # iid -> 行番号は読み込み時に作ってあるので、文字列を数値に直さない
+        i = self.tree_loader.index_of.get(sel[0])
+        return i if i is not None and i < len(self.titles_raw) else None
 
     def current_query(self) -> str:
-        r = self.selected_row()
-        if not r:
+        i = self.selected_index()
+        if i is None:
             return ""
-        return r.title_raw if self.search_mode.get() == "RAW" else r.search_key
+        return self.titles_raw[i] if self.search_mode.get() == "RAW" else self.search_key(i)
 
     def update_search_preview(self):
         q = self.current_query()
@@ -1005,13 +1350,16 @@ class App(tk.Tk):
         self.search_preview.set(f"[{mode}] {q}" if q else "（未選択）")
 
     def ai_search(self, engine: str = None):
-        if not self.selected_row():
+        if self.selected_index() is None:
             messagebox.showinfo("AI検索", "タイトルを選択してください")
             return
         eng = engine or self.engine_var.get()
         if eng not in self.engines:
             eng = self.engine_names()[0]
         tpl = self.engines[eng]
+        # 起動時には不要なので、検索時に読み込む
+        import urllib.parse
+        import webbrowser
         q = self.current_query()
         q_enc = urllib.parse.quote(q, safe="")
         try:
@@ -1056,64 +1404,63 @@ class App(tk.Tk):
 
         def on_save():
             raw = txt.get("1.0", "end").splitlines()
-            self.ignore_words = [x.strip() for x in raw if x.strip()]
+            self.ignore_words = dict.fromkeys(x.strip() for x in raw if x.strip())
             win.destroy()
             if self.material_win and self.material_win.winfo_exists():
-                self.material_win.refresh_all()
+                self.material_win.schedule_refresh()
 
         ttk.Button(btns, text="保存", command=on_save).pack(side="right")
         ttk.Button(btns, text="キャンセル", command=win.destroy).pack(side="right", padx=8)
 
     def build_ai_prompt(self) -> str:
         folder = self.path_var.get().strip()
-        ex = self.material_ex[:80]
-        keep = self.material_keep[:50]
-        ig = self.ignore_words[:80]
-        sample = [self.rows[i].title_raw for i in self.filtered[:120]]
-
-        lines = []
-        lines.append("あなたは正規表現の専門家です。次の『タイトル名のゴミ』を削除する正規表現ルール案を複数作ってください。")
-        lines.append("")
-        lines.append("【目的】")
-        lines.append("- ファイル名は変更せず、文字列からゴミだけを除去して検索・分類に使う。")
-        lines.append("- ルールは小さく分割し、ON/OFFしやすく。")
-        lines.append("- それぞれ『何を消すか』を短く説明する。")
-        lines.append("")
-        if folder:
-            lines.append(f"【対象フォルダ】{folder}")
+        ex = list(islice(self.material_ex, 80))
+        keep = list(islice(self.material_keep, 50))
+        ig = list(islice(self.ignore_words, 80))
         g = self.genre_var.get() if hasattr(self, "genre_var") else "（無選択）"
-        if g and g != "（無選択）":
-            lines.append(f"【ジャンル】{g}")
-        lines.append(f"【作成日時】{time.strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append("")
-        if ig:
-            lines.append("【無視語（候補）】")
-            lines.extend([f"- {w}" for w in ig])
-            lines.append("")
-        if ex:
-            lines.append("【EX: 消したい例（ゴミ入り）】")
-            lines.extend([f"- {t}" for t in ex])
-            lines.append("")
-        if keep:
-            lines.append("【KEEP: 消さない例】")
-            lines.extend([f"- {t}" for t in keep])
-            lines.append("")
-        lines.append("【追加サンプル（傾向）】")
-        lines.extend([f"- {t}" for t in sample])
-        lines.append("")
-        lines.append("【出力フォーマット】（ルールごと）")
-        lines.append("- name: ルール名")
-        lines.append("- pattern: 正規表現（1行）")
-        lines.append("- why: 何を消すか（日本語で簡潔）")
-        lines.append("- 注意: 誤爆しそうな例")
-        lines.append("")
-        return "\n".join(lines)
+        sample_idx = tuple(self.filtered[:120])
+        stamp = f"【作成日時】{time.strftime('%Y-%m-%d %H:%M:%S')}"
+
+        # 入力が前回と同じなら、作成日時の行だけ差し替えて返す
+        # （行番号は読み込みごとに意味が変わるので、読み込みの世代も鍵に含める）
+        key = (folder, g, tuple(ex), tuple(keep), tuple(ig), sample_idx, self._load_gen)
+        memo = self._prompt_memo
+        if memo is not None and memo[0] == key:
+            return f"{memo[1]}{stamp}\n{memo[2]}"
+
+        cache = self._prompt_cache
+        titles = self.titles_raw
+        sample = []
+        for i in sample_idx:
+            line = cache.get(i)
+            if line is None:
+                line = cache[i] = f"- {titles[i]}\n"
+            sample.append(line)
+
+        head = "".join([
+            PROMPT_INTRO,
+            f"【対象フォルダ】{folder}\n" if folder else "",
+            f"【ジャンル】{g}\n" if g and g != "（無選択）" else "",
+        ])
+        blocks = "".join(
+            f"{title}\n" + "".join([f"- {x}\n" for x in items]) + "\n"
+            for title, items in (
+                ("【無視語（候補）】", ig),
+                ("【EX: 消したい例（ゴミ入り）】", ex),
+                ("【KEEP: 消さない例】", keep),
+            )
+            if items
+        )
+        tail = "".join(["\n", blocks, "【追加サンプル（傾向）】\n", *sample, PROMPT_OUTPUT_FORMAT])
+
+        self._prompt_memo = (key, head, tail)
+        return f"{head}{stamp}\n{tail}"
 
     # ---------- workshop ----------
     def resolve_workshop(self) -> Optional[str]:
         if self.workshop_path and os.path.exists(self.workshop_path):
             return self.workshop_path
-                # 同フォルダ内の候補を順に探す（新しいもの優先）
+        # 同フォルダ内の候補を順に探す（新しいもの優先）
         candidates = [
             DEFAULT_WORKSHOP,
             "ai_title_workshop_v27_SAFE_COLOR_UNDO_TMP.py",
@@ -1122,9 +1469,17 @@ class App(tk.Tk):
             "ai_title_workshop_v27_SAFE.py",
             "ai_title_workshop_v27.py",
         ]
+        # 候補ごとに exists を呼ばず、フォルダを1回だけ読んで名前で照合する
+        # （normcase で Windows の大文字小文字の違いも exists と同じく無視する）
+        base = app_dir()
+        try:
+            with os.scandir(base) as it:
+                present = {os.path.normcase(e.name) for e in it if e.is_file()}
+        except OSError:
+            present = set()
         for fn in candidates:
-            cand = os.path.join(app_dir(), fn)
-            if os.path.exists(cand):
+            if os.path.normcase(fn) in present:
+                cand = os.path.join(base, fn)
                 self.workshop_path = cand
                 return cand
         path = filedialog.askopenfilename(title="工房の .py を選択", initialdir=app_dir(), filetypes=[("Python file", "*.py"), ("All files", "*.*")])
@@ -1155,7 +1510,7 @@ class App(tk.Tk):
             messagebox.showerror("工房", f"起動に失敗しました: {e}")
 
     def update_status(self):
-        self.status_var.set(f"表示: {len(self.filtered)} / 全体: {len(self.rows)}   | 既定: {self.engine_var.get()}   | ジャンル: {self.genre_var.get() if hasattr(self, 'genre_var') else '（無選択）'}   | 検索: {self.search_mode.get()}")
+        self.status_var.set(f"表示: {len(self.filtered)} / 全体: {len(self.titles_raw)}   | 既定: {self.engine_var.get()}   | ジャンル: {self.genre_var.get() if hasattr(self, 'genre_var') else '（無選択）'}   | 検索: {self.search_mode.get()}")
 
 if __name__ == "__main__":
     App().mainloop()
@@ -17,11 +17,26 @@
 import os
 import re
 import json
-import argparse
+import sys
+import time
+import types
+import tempfile
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Tuple
+from functools import lru_cache
+from typing import List, Optional, Dict, Set, Tuple
+
+try:  # あれば速い orjson で書き出す（無ければ標準の json）
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # Python 3.11+
+    import re._parser as sre_parse
+except ImportError:
+    import sre_parse
 
 # ---- 材料数の目安（色でガイド） ----
 EX_MIN, EX_MAX = 5, 15
@@ -40,6 +55,13 @@ def _color_for_count(count: int, min_v: int, max_v: int) -> str:
 
 APP_TITLE = "AI Title Workshop v27 (Factory)"
 
+# 再計算（ヒット数・一覧・プレビュー）をまとめるまでの待ち時間(ms)
+REFRESH_DELAY_MS = 150
+# 別スレッドのヒット数集計が終わったかを見に行く間隔(ms)
+HITS_POLL_MS = 30
+# プレビューに並べるタイトル数
+PREVIEW_LINES = 200
+
 SCOPE_TMP = "TMP"
 SCOPE_GLOBAL = "__global__"
 SCOPE_GENRE = "__genre__"
@@ -50,19 +72,36 @@ SCOPE_LABELS = {
 }
 
 # ---------- Models ----------
-@dataclass
 class Rule:
-    key: str
-    name: str
-    pattern: str
-    why: str
-    enabled: bool = True
-    flags: int = 0
-    source: str = "WORKSHOP"
-    error: str = ""
-    genres: Optional[List[str]] = None
-    scope: str = SCOPE_GLOBAL
-    apply_genre: str = ""
+    # ルールは数が多く、ヒット数の集計などで属性を何度も読むので __dict__ を持たせない
+    # 後半は工房が内部で使う作業用の値（保存はしない）
+    __slots__ = (
+        "key", "name", "pattern", "why", "enabled", "flags", "source", "error",
+        "genres", "scope", "apply_genre",
+        "_hit", "_sort_key", "_sig", "_cached_compiled",
+    )
+
+    def __init__(self, key: str, name: str, pattern: str, why: str, enabled: bool = True, flags: int = 0,
+                 source: str = "WORKSHOP", error: str = "", genres: Optional[List[str]] = None,
+                 scope: str = SCOPE_GLOBAL, apply_genre: str = ""):
+        self.key = key
+        self.name = name
+        self.pattern = pattern
+        self.why = why
+        self.enabled = enabled
+        self.flags = flags
+        self.source = source
+        self.error = error
+        self.genres = genres
+        self.scope = scope
+        self.apply_genre = apply_genre
+        self._hit = 0
+        self._sort_key = (0, name.lower())
+        self._sig: Optional[tuple] = None  # 前回コンパイルしたときの (pattern, flags, enabled)
+        self._cached_compiled: Optional[re.Pattern] = None
+
+    def __repr__(self) -> str:
+        return f"Rule(key={self.key!r}, name={self.name!r}, pattern={self.pattern!r}, enabled={self.enabled!r})"
 
 # ---------- Helpers ----------
 def safe_load_json(path: str):
@@ -72,23 +111,382 @@ def safe_load_json(path: str):
     except Exception:
         return None
 
+def json_bytes(data) -> bytes:
+    # 人が読める形（インデント付き・日本語そのまま）の UTF-8 で書き出す
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # orjson が扱えない型が混じっていたら標準の json に任せる
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+# 新しく作るファイルの権限（umask を反映した rw-rw-rw-）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _write_temp(path: str, data: bytes, mode: int = _FILE_MODE) -> str:
+    """path と同じフォルダの一時ファイル（名前は毎回別）に data を書き、その名前を返す
+
+    失敗したら一時ファイルは消して OSError をそのまま出す。
+    """
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                               dir=os.path.dirname(path) or ".")
+    try:
+        try:
+            view = memoryview(data)
+            while view:  # 小さければ os.write 1回で終わる
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.chmod(tmp, mode)  # mkstemp は本人のみ読み書き可で作るので合わせ直す
+    except OSError:
+        _remove_quietly(tmp)
+        raise
+    return tmp
+
+def replace_file(path: str, data: bytes):
+    # 一時ファイルに書いてから置き換える（途中で落ちても、書きかけのファイルが残らない）
+    try:
+        mode = os.stat(path).st_mode & 0o7777  # 既にあるファイルの権限は引き継ぐ
+    except OSError:
+        mode = _FILE_MODE
+    tmp = _write_temp(path, data, mode)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        _remove_quietly(tmp)
+        raise
+
 def safe_save_json(path: str, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    replace_file(path, json_bytes(data))
+
+def samples_path(workspace_path: str) -> str:
+    # workspace.json の sample_titles は隣の workspace.samples.json に分けて置く
+    return os.path.splitext(workspace_path)[0] + ".samples.json"
 
 def normalize_preview(s: str, n: int = 80) -> str:
     s = (s or "").replace("\n", " ").replace("\r", " ")
     return s if len(s) <= n else s[: max(0, n - 3)] + "..."
 
+@lru_cache(maxsize=512)
+def _compile_cached(pattern: str, flags: int) -> re.Pattern:
+    # 編集のたびに全ルールを再コンパイルするので、変わっていないルールは前の結果を使う
+    return re.compile(pattern, flags)
+
+# これ以上の語数の「固定文字列の OR」は木構造の正規表現に組み直す
+TRIE_MIN_WORDS = 4
+
+def _scan_top(body: str):
+    """エスケープと文字クラスを飛ばしながら、括弧の外（深さ0）の位置と文字を返す
+
+    閉じ括弧は、閉じた後の深さで判定する（全体を包む括弧の終わりが深さ0で出てくる）。
+    """
+    depth = 0
+    in_class = False
+    i = 0
+    n = len(body)
+    while i < n:
+        c = body[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            if c == "]":
+                in_class = False
+        elif c == "[":
+            in_class = True
+            if body[i + 1:i + 2] == "]":
+                i += 1  # 先頭の ] は文字そのもの
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                yield i, c
+        elif depth == 0:
+            yield i, c
+        i += 1
+
+def _split_top_alternatives(body: str) -> List[str]:
+    """括弧・文字クラスの外にある | で body を分ける"""
+    parts = []
+    start = 0
+    for i, c in _scan_top(body):
+        if c == "|":
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return parts
+
+def _literal_words(pattern: str, flags: int) -> Optional[Tuple[str, List[str]]]:
+    """pattern が「固定文字列の OR」（全体を1つの括弧で包んだものも可）なら (先頭フラグ, 語のリスト)"""
+    prefix = ""
+    m = _LEADING_FLAGS_RE.match(pattern)
+    while m:
+        prefix += m.group(0)
+        pattern = pattern[m.end():]
+        m = _LEADING_FLAGS_RE.match(pattern)
+    # 全体を包む (...) / (?:...) を外す（中身がそのまま OR になっている場合だけ）
+    for opener in ("(?:", "("):
+        if pattern.startswith(opener) and pattern.endswith(")"):
+            # 最初の括弧が閉じる位置が末尾なら、全体を包んでいる
+            closes = [i for i, c in _scan_top(pattern) if c == ")"]
+            if closes and closes[0] == len(pattern) - 1:
+                pattern = pattern[len(opener):-1]
+            break
+    alts = _split_top_alternatives(pattern)
+    if len(alts) < TRIE_MIN_WORDS:
+        return None
+    words = []
+    for alt in alts:
+        try:
+            parsed = sre_parse.parse(prefix + alt, flags)
+        except Exception:
+            return None
+        items = list(parsed)
+        if not items or any(op is not sre_parse.LITERAL for op, _ in items):
+            return None
+        words.append("".join(chr(av) for _, av in items))
+    return prefix, words
+
+def _trie_source(node: Dict) -> str:
+    # 辞書の木から正規表現を作る（"" キーはそこで語が終わる印）
+    alts = []
+    chars = []
+    for ch in sorted(k for k in node if k):
+        child = node[ch]
+        if len(child) == 1 and "" in child:
+            chars.append(re.escape(ch))
+        else:
+            alts.append(re.escape(ch) + _trie_source(child))
+    if chars:
+        alts.append(chars[0] if len(chars) == 1 else "[" + "".join(chars) + "]")
+    src = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+    if "" in node:
+        src = f"(?:{src})?"
+    return src
+
+def literal_trie_pattern(pattern: str, flags: int = 0) -> Optional[str]:
+    """「固定文字列の OR」を共通の頭でまとめた正規表現に組み直す。当てはまらなければ None
+
+    a|ab|abc|b のような OR は、re が位置ごとに全候補を順に試すので語数に比例して遅い。
+    木にまとめると1文字ずつの分岐になる（ヒットする文字列の集合は変わらない）。
+    ルールの pattern 自体は書き換えず、コンパイルにだけ使う。
+    """
+    found = _literal_words(pattern, flags)
+    if found is None:
+        return None
+    prefix, words = found
+    if "" in words:
+        return None
+    trie: Dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return f"{prefix}(?:{_trie_source(trie)})"
+
 def compile_rule(r: Rule) -> Optional[re.Pattern]:
     if (not r.enabled) or (not r.pattern):
         return None
+    # 入力中の1文字ごとに全タイトルへ当てるので、止まる恐れのある式は無効扱いにする
+    if nested_repeat_risk(r.pattern, r.flags):
+        r.error = "ReDoS の恐れ: 量指定子が入れ子になっています"
+        return None
     try:
-        return re.compile(r.pattern, r.flags)
+        return _compile_cached(literal_trie_pattern(r.pattern, r.flags) or r.pattern, r.flags)
     except re.error as e:
         r.error = str(e)
         return None
 
+# 先頭のグローバルフラグ（例: "(?i)"）と、グループを参照する書き方
+# （\1 などの後方参照、(?P=name)、(?(1)...) / (?(name)...) の条件分岐）
+_LEADING_FLAGS_RE = re.compile(r"\(\?([aiLmsux]+)\)")
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+# ルールの flags のうち、(?i:...) のようにグループ単位で付けられるもの
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+def _inline_flags(flags: int) -> Optional[str]:
+    """r.flags をグループに付けるフラグ文字（"is" など）に直す。直せないものがあれば None"""
+    out = ""
+    for bit, ch in _INLINE_FLAGS:
+        if flags & bit:
+            out += ch
+            flags &= ~bit
+    # str の正規表現では UNICODE は既定なので、付いていても何もしなくてよい
+    return None if flags & ~re.UNICODE else out
+
+def _union_part(pattern: str, flags: str = "") -> Optional[str]:
+    """合成用に pattern を1つのグループへ包む。合成できないものは None
+
+    先頭の (?i) などと、ルールの flags（_inline_flags）は途中に置けないので (?i:...) に直す。
+    後方参照や (?(1)...) はグループ番号がずれるので合成しない。
+    """
+    m = _LEADING_FLAGS_RE.match(pattern)
+    while m:
+        flags += m.group(1)
+        pattern = pattern[m.end():]
+        m = _LEADING_FLAGS_RE.match(pattern)
+    if set(flags) - set("imsx"):
+        return None
+    if _BACKREF_RE.search(pattern):
+        return None
+    # (?x) の行末コメントが閉じ括弧を飲み込まないよう、改行をはさむ
+    flags = "".join(sorted(set(flags)))
+    return f"(?{flags}:{pattern}\n)" if "x" in flags else f"(?{flags}:{pattern})"
+
+def build_union_regex(rules: List[Rule], compiled: List[Optional[re.Pattern]]) -> Optional[re.Pattern]:
+    """有効なルールを1本にまとめる。match(t) の lastgroup "_r<i>" が最初にヒットするルール番号
+
+    各ルールを先読み (?=[\\s\\S]*?(?:pattern)) にして並べるので、文字列中の位置ではなく
+    ルールの順番で先に当たったものが選ばれる（1ルールずつ search するのと同じ結果）。
+    合成できないルールがあるときは None（呼び出し側はルールごとの search に戻る）。
+    """
+    parts = []
+    for i, (r, cre) in enumerate(zip(rules, compiled)):
+        if (not r.enabled) or cre is None:
+            continue
+        flags = _inline_flags(r.flags)
+        # 組み直した後の pattern（literal_trie_pattern）
+        body = _union_part(cre.pattern, flags) if flags is not None else None
+        if body is None:
+            return None
+        parts.append(f"(?=[\\s\\S]*?{body})(?P<_r{i}>)")
+    if not parts:
+        return None
+    try:
+        return re.compile("|".join(parts))
+    except (re.error, RecursionError, OverflowError):
+        return None
+
+@lru_cache(maxsize=512)
+def min_match_len(pattern: str, flags: int = 0) -> int:
+    """pattern がヒットするのに最低限必要な文字数（わからなければ 0）"""
+    try:
+        return sre_parse.parse(pattern, flags).getwidth()[0]
+    except Exception:
+        return 0
+
+def first_hit(t: str, union: Optional[re.Pattern], compiled: List[Optional[re.Pattern]],
+              literals: List[Optional[str]], min_lens: List[int]) -> Optional[int]:
+    """t に最初にヒットする有効ルールの番号（なければ None）
+
+    union があればそれ1回で決める。無ければルールごとに search する
+    （無効・エラーのルールは compiled が None）。
+    """
+    if union is not None:
+        m = union.match(t)
+        return int(m.lastgroup[2:]) if m else None
+    for idx, cre in enumerate(compiled):
+        if cre is None:
+            continue
+        # 短すぎるタイトルや、必須の文字列を含まないタイトルは正規表現を動かすまでもない
+        if len(t) < min_lens[idx]:
+            continue
+        lit = literals[idx] if idx < len(literals) else None
+        if lit is not None and lit not in t:
+            continue
+        if cre.search(t):
+            return idx
+    return None
+
+def count_rule_hits(titles: List[str], union: Optional[re.Pattern], compiled: List[Optional[re.Pattern]],
+                    literals: List[Optional[str]], min_lens: List[int],
+                    head: int = 0) -> Tuple[List[int], List[Optional[int]]]:
+    """ルールごとの「最初にヒットした件数」と、先頭 head 件のタイトルが当たったルール番号
+
+    Tk には触らないので別スレッドで呼べる。
+    """
+    hits = [0] * len(compiled)
+    # 同じタイトル（別フォルダの "01" や "cover" など）は1回だけ調べ、件数を重みとして足す
+    # （タイトルを連結して finditer すると、.* などが区切りを越えて隣のタイトルに当たる）
+    uniq = Counter(titles)
+    # どの有効ルールにも足りない長さのタイトル（"01" など）は調べずに外れとする
+    shortest = min((n for n, cre in zip(min_lens, compiled) if cre is not None), default=0)
+    winner = {t: first_hit(t, union, compiled, literals, min_lens) if len(t) >= shortest else None
+              for t in uniq}
+    for t, n in uniq.items():
+        idx = winner[t]
+        if idx is not None:
+            hits[idx] += n
+    return hits, [winner[t] for t in titles[:head]]
+
+# 事前チェックに使う固定文字列の最小長（短すぎると絞り込みにならない）
+LITERAL_MIN = 2
+
+def required_literal(pattern: str, flags: int = 0) -> Optional[str]:
+    """pattern がヒットするなら必ず含まれる固定文字列（最長のもの）。無ければ None
+
+    最上位に並ぶ LITERAL の連続だけを見る（グループの中や繰り返しには立ち入らない）。
+    大文字小文字を無視するルールは `in` で判定できないので対象外。
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    if (parsed.state.flags | flags) & sre_parse.SRE_FLAG_IGNORECASE:
+        return None
+    best = ""
+    run: List[str] = []
+    for op, av in list(parsed) + [(None, None)]:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best if len(best) >= LITERAL_MIN else None
+
+# 上限なしの繰り返し（+ * {n,}）
+_REPEAT_OPS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+def _only_repeats(items) -> bool:
+    """items が繰り返しだけでできていて、上限なしの繰り返しを含むか（グループの中も見る）"""
+    unbounded = False
+    for op, av in items:
+        if op is sre_parse.SUBPATTERN:
+            if not _only_repeats(av[-1]):
+                return False
+            unbounded = True
+        elif op in _REPEAT_OPS:
+            if av[1] == sre_parse.MAXREPEAT or _only_repeats(av[2]):
+                unbounded = True
+        else:
+            return False
+    return unbounded
+
+def nested_repeat_risk(pattern: str, flags: int = 0) -> bool:
+    """(a+)+ や (\w+\s*)* のように、上限なしの繰り返しの中身が繰り返しだけでできているか
+
+    こういう式はヒットしない文字列で分け方を総当たりして止まる（ReDoS）。
+    (?:\d+[,.])+ のように区切りが必須なものは対象外。
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return False
+    stack = [parsed]
+    while stack:
+        for op, av in stack.pop():
+            if op in _REPEAT_OPS and av[1] == sre_parse.MAXREPEAT and _only_repeats(av[2]):
+                return True
+            # グループ・分岐・先読みなどの中身もたどる
+            for a in av if isinstance(av, (tuple, list)) else ():
+                if isinstance(a, sre_parse.SubPattern):
+                    stack.append(a)
+                elif isinstance(a, list):
+                    stack.extend(x for x in a if isinstance(x, sre_parse.SubPattern))
+    return False
+
 def heuristic_suggestions(examples: List[str], ignore_words: List[str]) -> List[Rule]:
     """
     乱暴に見えるが、最初の「叩き台」には十分。
@@ -111,15 +509,17 @@ def heuristic_suggestions(examples: List[str], ignore_words: List[str]) -> List[
         pattern=r"[\[\(（【].{1,30}?[\]\)）】]",
         why="表紙/差分/修正版などが括弧に入ることが多いため",
     ))
-    # ignore_words を OR でまとめた軽量ルール（まずは素朴）
+    # ignore_words を OR でまとめた1本の正規表現
     if ignore_words:
-        # エスケープして OR
-        parts = [re.escape(w) for w in ignore_words if w.strip()]
+        # 重複を除いて先頭80語に絞り、長い語から並べる（短い語が先に当たって長い語を隠さないように）
+        words = list(dict.fromkeys(w for w in ignore_words if w.strip()))[:80]
+        words.sort(key=len, reverse=True)
+        parts = [re.escape(w) for w in words]
         if parts:
             rules.append(Rule(
                 key="ignore_words",
                 name="無視語（まとめ）",
-                pattern=r"(?i)(" + "|".join(parts[:80]) + r")",
+                pattern=r"(?i)(" + "|".join(parts) + r")",
                 why="無視語に入っている語をまとめて除外するため",
             ))
     # 先頭の "IMG_2023" みたいなカメラ系
@@ -132,17 +532,23 @@ def heuristic_suggestions(examples: List[str], ignore_words: List[str]) -> List[
     return rules
 
 # ---------- App ----------
-class WorkshopApp(tk.Toplevel):
+class _WorkshopMixin:
+    """工房の画面と処理の本体。Toplevel（本体から呼ぶ）か Tk（単体起動）と組み合わせて使う"""
+
     def __init__(self, master, workspace_path: str, rules_pack_path: str):
-        super().__init__(master)
+        if master is None:
+            super().__init__()  # 単体起動: この窓自身が Tk のルート
+        else:
+            super().__init__(master)
         self.title(APP_TITLE)
         self.geometry("1280x820")
         self.minsize(980, 700)
 
-        try:
-            self.transient(master)
-        except Exception:
-            pass
+        if master is not None:
+            try:
+                self.transient(master)
+            except Exception:
+                pass
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.workspace_path = workspace_path
@@ -157,6 +563,24 @@ class WorkshopApp(tk.Toplevel):
 
         self.rules: List[Rule] = []
         self.compiled: List[Optional[re.Pattern]] = []
+        self._refresh_pending: Optional[str] = None  # refresh_all の予約（after ID）
+        self._preview_text: Optional[str] = None  # プレビューに表示中の文字列
+        self._saved_text: Optional[bytes] = None  # 最後に workspace へ書いた JSON
+        self._saved_samples: Optional[List[str]] = None  # 最後に samples_path へ書いた sample_titles
+        self._union: Optional[re.Pattern] = None  # 有効ルールをまとめた正規表現（build_union_regex）
+        self._union_sig: Optional[tuple] = None  # _union を作ったときの有効ルールの並び
+
+        # ヒット数の集計は1本の作業スレッドで行う（世代番号で古い結果を捨てる）
+        self._scan_pool = ThreadPoolExecutor(max_workers=1)
+        self._hits_future: Optional[Future] = None
+        self._hits_gen = 0
+        self._hits_error = ""  # 直前の集計で起きた例外（プレビューの [ERROR] に出す）
+        self._first_hit: List[Optional[int]] = []  # プレビューの各タイトルに最初に当たったルール番号
+        self._tree_values: Dict[str, tuple] = {}  # ルール一覧の各行に今出している値
+        self._tree_rules: Dict[str, Rule] = {}  # ルール一覧の各行がどのルールか（番号がずれたら入れ直す）
+        self._tree_order: tuple = ()  # ルール一覧の今の並び（iid）
+        self._literals: List[Optional[str]] = []  # ルールごとの必須の固定文字列（required_literal）
+        self._min_lens: List[int] = []  # ルールごとのヒットに必要な最短の文字数（min_match_len）
 
         self._build_menu()
         self._build_ui()
@@ -182,7 +606,7 @@ class WorkshopApp(tk.Toplevel):
         m_file.add_separator()
         m_file.add_command(label="rules_pack.json に保存", command=self.export_rules_pack)
         m_file.add_separator()
-        m_file.add_command(label="終了", command=self.destroy)
+        m_file.add_command(label="終了", command=self.on_close)
 
         m_tools = tk.Menu(menubar, tearoff=False)
         menubar.add_cascade(label="ツール", menu=m_tools)
@@ -349,8 +773,8 @@ class WorkshopApp(tk.Toplevel):
 
         if not isinstance(words, list):
             words = []
-        for s in words[:500]:
-            self.ig_list.insert("end", s)
+        # 1件ずつではなく1回の呼び出しでまとめて入れる
+        self.ig_list.insert("end", *words[:500])
 
     def _ensure_scoped_structures(self):
         if not hasattr(self, "ignore_scoped") or not isinstance(self.ignore_scoped, dict):
@@ -395,6 +819,8 @@ class WorkshopApp(tk.Toplevel):
         if not messagebox.askyesno("確認", "TMP（試作）を空にしますか？\nTMPの無視語とTMPのルールが削除されます。"):
             return
         self.rules = [r for r in self.rules if getattr(r, "scope", SCOPE_GLOBAL) != SCOPE_TMP]
+        self._reset_rule_tree()
+        self.recompile_all()  # 番号がずれるので、まとめた正規表現も作り直す
         self.ignore_scoped[SCOPE_TMP] = []
         self.save_workspace()
         self.refresh_rule_tree()
@@ -407,13 +833,29 @@ class WorkshopApp(tk.Toplevel):
         data["genre"] = self.genre
         data["exclude_examples"] = self.exclude_examples
         data["keep_examples"] = self.keep_examples
-        data["sample_titles"] = self.sample_titles
         data["ignore_scoped"] = self.ignore_scoped
         data["ignore_words"] = list(self.ignore_scoped.get(SCOPE_GLOBAL, []))  # legacy
         data["rules"] = [rule_to_dict(r) for r in self.rules]
-        safe_save_json(self.workspace_path, data)
+        # sample_titles は別ファイル（samples_path）に書く。この画面では変わらないので、読み込み後に変わったときだけ
+        # 別ファイルに書けたときだけ workspace.json から外す（書けなければ従来どおり workspace.json に残す）
+        if self.sample_titles != self._saved_samples:
+            try:
+                safe_save_json(samples_path(self.workspace_path), self.sample_titles)
+                self._saved_samples = list(self.sample_titles)
+            except OSError:
+                pass
+        if self.sample_titles == self._saved_samples:
+            data.pop("sample_titles", None)
+        else:
+            data["sample_titles"] = self.sample_titles
+        # 中身が前回書いたものと同じならファイルには書かない（ルールの ON/OFF などのたびに呼ばれるので）
+        text = json_bytes(data)
+        if text != self._saved_text:
+            replace_file(self.workspace_path, text)
+            self._saved_text = text
         self.workspace = data
     def on_close(self):
+        self._scan_pool.shutdown(wait=False)
         try:
             self.destroy()
         except Exception:
@@ -433,6 +875,8 @@ class WorkshopApp(tk.Toplevel):
 
         self.workspace_path = path
         self.workspace = data
+        self._saved_text = None  # 読み込んだファイルの書式は問わず、次の保存は必ず書く
+        _compile_cached.cache_clear()  # 別のルール集に切り替わるので持ち越さない
 
         # workspaceに保存されている「ジャンル」は、ユーザー定義カテゴリの"現在選択"です
         self.genre = str(data.get("genre") or "未選択")
@@ -444,7 +888,14 @@ class WorkshopApp(tk.Toplevel):
 
         self.exclude_examples = list(data.get("exclude_examples") or [])
         self.keep_examples = list(data.get("keep_examples") or [])
-        self.sample_titles = list(data.get("sample_titles") or [])
+        # 以前の1ファイル形式なら workspace.json 側を、無ければ別ファイル側を読む
+        if "sample_titles" in data:
+            self.sample_titles = list(data.get("sample_titles") or [])
+            self._saved_samples = None  # 次の保存で別ファイルへ移す
+        else:
+            samples = safe_load_json(samples_path(path))
+            self.sample_titles = [str(t) for t in samples] if isinstance(samples, list) else []
+            self._saved_samples = list(self.sample_titles)
 
         # rules in workspace（あれば）
         rules_data = data.get("rules") or []
@@ -474,20 +925,20 @@ class WorkshopApp(tk.Toplevel):
                 rules.append(r)
 
         self.rules = rules
+        self._reset_rule_tree()
 
         self._ensure_scoped_structures()
         self.update_meta()
 
+        self.recompile_all()
         self.refresh_workspace_lists()
         self.refresh_all()
     def refresh_workspace_lists(self):
         self.ex_list.delete(0, "end")
-        for s in self.exclude_examples[:500]:
-            self.ex_list.insert("end", s)
+        self.ex_list.insert("end", *self.exclude_examples[:500])
 
         self.keep_list.delete(0, "end")
-        for s in self.keep_examples[:500]:
-            self.keep_list.insert("end", s)
+        self.keep_list.insert("end", *self.keep_examples[:500])
 
         self.refresh_ignore_list()
 
@@ -549,6 +1000,8 @@ class WorkshopApp(tk.Toplevel):
 
         self.rules_pack_path = path
         self.rules = rules
+        self._reset_rule_tree()
+        _compile_cached.cache_clear()
         self.recompile_all()
         self.refresh_all()
 
@@ -581,10 +1034,30 @@ class WorkshopApp(tk.Toplevel):
 
     # ---------- Rule operations ----------
     def recompile_all(self):
+        # pattern / flags / ON・OFF が前回と同じルールは、前回のコンパイル結果（とエラー）をそのまま使う
         self.compiled = []
         for r in self.rules:
-            r.error = ""
-            self.compiled.append(compile_rule(r))
+            sig = (r.pattern, r.flags, r.enabled)
+            if getattr(r, "_sig", None) != sig:
+                r.error = ""
+                r._cached_compiled = compile_rule(r)  # type: ignore
+                r._sig = sig  # type: ignore
+            self.compiled.append(r._cached_compiled)  # type: ignore
+
+        # ヒットに必要な最短の文字数（ルールごとに lru_cache されるので毎回作ってよい）
+        self._min_lens = [min_match_len(cre.pattern, cre.flags) if cre is not None else 0 for cre in self.compiled]
+
+        # まとめた正規表現は、有効なルールの並びと中身が変わったときだけ作り直す
+        union_sig = tuple((i, cre.pattern, r.flags) for i, (r, cre) in enumerate(zip(self.rules, self.compiled))
+                          if r.enabled and cre is not None)
+        if union_sig == self._union_sig:
+            return
+        self._union_sig = union_sig
+        self._union = build_union_regex(self.rules, self.compiled)
+        # まとめられないときだけ使うので、そのときだけ作る
+        if self._union is None:
+            self._literals = [required_literal(r.pattern, r.flags) if cre is not None else None
+                              for r, cre in zip(self.rules, self.compiled)]
 
     def add_heuristics(self):
         base = heuristic_suggestions(self.exclude_examples, self.ignore_words)
@@ -612,7 +1085,7 @@ class WorkshopApp(tk.Toplevel):
         r.scope = sc
         r.apply_genre = self.genre if sc == SCOPE_GENRE else ""
         self.save_workspace()
-        self.refresh_all()
+        self._refresh_all_now()
         # select last
         self.select_rule_index(len(self.rules)-1)
 
@@ -631,7 +1104,7 @@ class WorkshopApp(tk.Toplevel):
             return
         self.rules[idx].enabled = not self.rules[idx].enabled
         self.recompile_all()
-        self.refresh_all()
+        self._refresh_all_now()
         self.select_rule_index(idx)
 
     def apply_rule_edit(self):
@@ -651,7 +1124,7 @@ class WorkshopApp(tk.Toplevel):
             self.flags_var.set("0")
         r.pattern = self.pattern_txt.get("1.0", "end").strip()
         self.recompile_all()
-        self.refresh_all()
+        self._refresh_all_now()
         self.select_rule_index(idx)
 
     def copy_selected_pattern(self):
@@ -664,6 +1137,7 @@ class WorkshopApp(tk.Toplevel):
             return
         self.clipboard_clear()
         self.clipboard_append(pat)
+        self.update()
         messagebox.showinfo("コピー", "正規表現をクリップボードにコピーしました。")
 
     # ---------- Selection ----------
@@ -685,34 +1159,81 @@ class WorkshopApp(tk.Toplevel):
 
     # ---------- Refresh / Preview ----------
     def refresh_all(self):
+        # 続けて呼ばれたら最後の1回から REFRESH_DELAY_MS 後にまとめて再計算する
+        if self._refresh_pending is not None:
+            self.after_cancel(self._refresh_pending)
+        self._refresh_pending = self.after(REFRESH_DELAY_MS, self._run_refresh)
+
+    def _run_refresh(self):
+        self._refresh_pending = None
+        if self.winfo_exists():
+            self._refresh_all_now()
+
+    def _refresh_all_now(self):
+        # 直後に行を選択する操作は、ツリーができている必要があるのでこちらを使う
+        if self._refresh_pending is not None:
+            self.after_cancel(self._refresh_pending)
+            self._refresh_pending = None
         self.update_rule_hits()
         self.refresh_rule_tree()
         self.show_rule_detail()
-        self.refresh_preview()
+        # プレビューは集計結果（_first_hit）が届いた _poll_hits で描き直す
 
     def update_rule_hits(self):
         # first-hit counting like main
-        for r in self.rules:
-            r._hit = 0  # type: ignore
-
-        titles = self.sample_titles or []
+        # 集計は別スレッドで行い、終わったら一覧を並べ直す（その間も画面は止めない）
         # cap to keep UI snappy
-        titles = titles[:3000]
+        titles = (self.sample_titles or [])[:3000]
+
+        if self._hits_future is not None:
+            self._hits_future.cancel()  # まだ始まっていない前回分は捨てる
+        self._hits_gen += 1
+        rules = list(self.rules)
+        fut = self._scan_pool.submit(count_rule_hits, titles, self._union, list(self.compiled), list(self._literals),
+                                     list(self._min_lens), PREVIEW_LINES)
+        self._hits_future = fut
+        self.after(HITS_POLL_MS, self._poll_hits, fut, self._hits_gen, rules)
+
+    def _poll_hits(self, fut: Future, gen: int, rules: List[Rule]):
+        if gen != self._hits_gen or not self.winfo_exists():
+            return  # 新しい集計が始まった / 窓が閉じた
+        if not fut.done():
+            self.after(HITS_POLL_MS, self._poll_hits, fut, gen, rules)
+            return
+        self._hits_future = None
+        if fut.cancelled():
+            return
+        err = fut.exception()
+        if err is not None:
+            self._hits_error = f"{type(err).__name__}: {err}"
+            self._first_hit = []  # ルールが変わっていると番号がずれるので、当たりは出さない
+            self.refresh_preview()
+            return
+        self._hits_error = ""
+        # 集計中にルールが増減・入れ替わっていたら、次の集計に任せる
+        if self.rules != rules:
+            return
+        hits, first = fut.result()
+        # 集計に使った正規表現が古い（ルール数と合わない）ときは捨てる
+        if len(hits) != len(rules):
+            return
+        self._first_hit = first
+        for r, n in zip(rules, hits):
+            r._hit = n
+            # 一覧の並び順（ヒット数の多い順 → 名前順）はヒット数が変わるここでだけ作る
+            r._sort_key = (-n, r.name.lower())
+        self.refresh_rule_tree()
+        self.refresh_preview()
 
-        compiled = self.compiled
-        for t in titles:
-            for idx, r in enumerate(self.rules):
-                cre = compiled[idx]
-                if (not r.enabled) or cre is None:
-                    continue
-                if cre.search(t):
-                    r._hit += 1  # type: ignore
-                    break
+    def _reset_rule_tree(self):
+        # ルールの一覧を丸ごと差し替えたときは、控えた値・並び・選択ごと捨てて作り直させる
+        self.rule_tree.delete(*self.rule_tree.get_children())
+        self._tree_values.clear()
+        self._tree_rules.clear()
+        self._tree_order = ()
 
     def refresh_rule_tree(self):
-        for it in self.rule_tree.get_children():
-            self.rule_tree.delete(it)
-
+        tree = self.rule_tree
         scope = self.get_current_scope()
         g = self.genre
 
@@ -724,9 +1245,11 @@ class WorkshopApp(tk.Toplevel):
                 return rs == SCOPE_GENRE and (getattr(r, "apply_genre", "") or "") == g
             return rs == SCOPE_GLOBAL
 
-        order = [i for i in range(len(self.rules)) if visible(self.rules[i])]
-        order.sort(key=lambda i: (-(getattr(self.rules[i], "_hit", 0)), self.rules[i].name.lower()))
+        rules = self.rules
+        order = [i for i in range(len(rules)) if visible(rules[i])]
+        order.sort(key=lambda i: getattr(rules[i], "_sort_key", (0, "")))
 
+        rows = []
         for i in order:
             r = self.rules[i]
             on = "ON" if r.enabled else "OFF"
@@ -743,7 +1266,39 @@ class WorkshopApp(tk.Toplevel):
             else:
                 scope_cell = "共通"
 
-            self.rule_tree.insert("", "end", iid=str(i), values=(scope_cell, on, hit, name))
+            rows.append((str(i), r, (scope_cell, on, hit, name)))
+
+        # 全部消して入れ直さず、残る行は変わった値だけ更新し、増えた行だけ insert、消えた行だけ delete
+        # （出している値は _tree_values に控えておき、Tk に問い合わせずに比べる）
+        # iid はルールの番号なので、削除などで別のルールの番号になった行も消して入れ直す
+        # （選択もそこで外れるので、消したルールの内容が隣のルールに「適用」されない）
+        shown = self._tree_values
+        owner = self._tree_rules
+        row_rules = {iid: r for iid, r, _ in rows}
+        gone = [iid for iid in shown if row_rules.get(iid) is not owner.get(iid)]
+        if gone:
+            tree.delete(*gone)
+            for iid in gone:
+                del shown[iid]
+                owner.pop(iid, None)
+            self._tree_order = ()  # 入れ直した行は末尾に付くので、並びは付け直す
+        for iid, r, values in rows:
+            owner[iid] = r
+            old = shown.get(iid)
+            if old is None:
+                tree.insert("", "end", iid=iid, values=values)
+            elif old == values:
+                continue
+            elif old[:2] == values[:2] and old[3] == values[3]:
+                tree.set(iid, "hit", values[2])  # 集計のあとはヒット数だけ変わることが多い
+            else:
+                tree.item(iid, values=values)
+            shown[iid] = values
+        # 並びが変わったときだけ、1回の呼び出しでまとめて付け直す
+        iids = tuple(iid for iid, _, _ in rows)
+        if iids != self._tree_order:
+            tree.set_children("", *iids)
+            self._tree_order = iids
 
     def show_rule_detail(self):
         idx = self.get_selected_rule_index()
@@ -762,34 +1317,35 @@ class WorkshopApp(tk.Toplevel):
         self.pattern_txt.delete("1.0", "end")
         self.pattern_txt.insert("1.0", r.pattern)
 
-    def refresh_preview(self):
+    def _set_preview(self, text: str):
+        # 前回と同じ内容なら消して入れ直さない（スクロール位置もそのまま）
+        if text == self._preview_text:
+            return
+        self._preview_text = text
         self.preview.delete("1.0", "end")
-        titles = self.sample_titles[:400] if self.sample_titles else []
+        self.preview.insert("1.0", text)
+
+    def refresh_preview(self):
+        titles = self.sample_titles[:PREVIEW_LINES] if self.sample_titles else []
         if not titles:
-            self.preview.insert("1.0", "sample_titles がありません（本体で読み込み→workspace保存してください）")
+            self._set_preview("sample_titles がありません（本体で読み込み→workspace保存してください）")
             return
 
-        lines = []
-        compiled = self.compiled
-        for t in titles[:200]:
-            hit = ""
-            for idx, r in enumerate(self.rules):
-                cre = compiled[idx]
-                if (not r.enabled) or cre is None:
-                    continue
-                if cre.search(t):
-                    hit = f" -> {r.name}"
-                    break
-            lines.append(t + hit)
+        # 正規表現は動かさず、集計のときに記録した当たりルールを並べるだけ
+        rules = self.rules
+        first = self._first_hit or [None] * len(titles)
+        lines = [t if idx is None else f"{t} -> {rules[idx].name}" for t, idx in zip(titles, first)]
 
         # errors
         errs = [r for r in self.rules if r.error]
-        if errs:
+        if errs or self._hits_error:
             lines.append("\n[ERROR]")
+            if self._hits_error:
+                lines.append(f"- ヒット数の集計に失敗しました（一覧のヒット数は前回の結果です）: {self._hits_error}")
             for r in errs[:20]:
                 lines.append(f"- {r.name}: {r.error}")
 
-        self.preview.insert("1.0", "\n".join(lines))
+        self._set_preview("\n".join(lines))
 
     # ---------- About ----------
     def show_about(self):
@@ -804,6 +1360,12 @@ class WorkshopApp(tk.Toplevel):
             "が中心です。"
         )
 
+class WorkshopApp(_WorkshopMixin, tk.Toplevel):
+    """本体の窓から開く工房"""
+
+class StandaloneWorkshopApp(_WorkshopMixin, tk.Tk):
+    """単体起動の工房（隠したルート窓を作らず、これ自身がルート）。master は None"""
+
 # ---------- Serialization ----------
 def rule_to_dict(r: Rule) -> Dict:
     d = {
@@ -817,32 +1379,56 @@ def rule_to_dict(r: Rule) -> Dict:
     }
     if r.genres:
         d["genres"] = r.genres
-    if getattr(r, "scope", None):
+    if r.scope:
         d["scope"] = r.scope
-    if getattr(r, "apply_genre", None):
+    if r.apply_genre:
         d["apply_genre"] = r.apply_genre
     if r.error:
         d["error"] = r.error
     return d
 
 def time_string() -> str:
-    import time
-    return time.strftime("%Y-%m-%d %H:%M:%S")
+    t = time.localtime()
+    return f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} {t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
 
 # ---------- Main ----------
-def parse_args():
+# コマンドラインの既定値（--workspace / --rules-pack）
+_CLI_DEFAULTS = {"workspace": "workspace.json", "rules_pack": "rules_pack.json"}
+
+@lru_cache(maxsize=1)
+def _get_parser():
+    # main() を何度呼んでも作るのは1回だけ。argparse も必要になったときだけ読み込む
+    import argparse
     ap = argparse.ArgumentParser()
-    ap.add_argument("--workspace", default="workspace.json")
-    ap.add_argument("--rules-pack", default="rules_pack.json")
-    return ap.parse_args()
+    ap.add_argument("--workspace", default=_CLI_DEFAULTS["workspace"])
+    ap.add_argument("--rules-pack", default=_CLI_DEFAULTS["rules_pack"])
+    return ap
 
-def ensure_workspace_file(path: str):
-    """workspace.json が無い場合に安全な初期値で作成（共有・復旧用）"""
-    if not path:
-        return
-    if os.path.exists(path):
-        return
-    data = {
+def parse_args(argv: Optional[List[str]] = None):
+    """--workspace X / --rules-pack X（= 区切りも可）だけなら argparse を使わずに読む
+
+    それ以外（-h や知らない引数、値の無いフラグ）は argparse に任せて、ヘルプやエラーを出させる。
+    """
+    args = sys.argv[1:] if argv is None else argv
+    out = dict(_CLI_DEFAULTS)
+    i = 0
+    while i < len(args):
+        name, eq, value = args[i].partition("=")
+        key = {"--workspace": "workspace", "--rules-pack": "rules_pack"}.get(name)
+        if key is None:
+            return _get_parser().parse_args(args)
+        if not eq:
+            i += 1
+            if i >= len(args) or args[i].startswith("-"):
+                return _get_parser().parse_args(args)
+            value = args[i]
+        out[key] = value
+        i += 1
+    return types.SimpleNamespace(**out)
+
+def _default_workspace() -> Dict:
+    """workspace.json が無いときの初期値。呼ぶたびに新しい dict を返す（使い回して書き換えられないように）"""
+    return {
         "genre": "（無選択）",
         "exclude_examples": [],
         "keep_examples": [],
@@ -850,27 +1436,65 @@ def ensure_workspace_file(path: str):
         "ignore_scoped": {"__global__": [], "TMP": [], "__genre__": {}},
         "rules": [],
     }
+
+# 中身は固定なので、書き出す形は先に作っておく
+_DEFAULT_WORKSPACE_BYTES = json_bytes(_default_workspace())
+
+# ensure_workspace_file で、あること（または作ったこと）を確かめ済みのパス
+_ENSURED_PATHS: Set[str] = set()
+
+def ensure_workspace_file(path):
+    """workspace.json が無い場合に安全な初期値で作成（共有・復旧用）。path は str か Path"""
+    if not isinstance(path, str):
+        path = os.fspath(path) if path else ""
+    if not path or path in _ENSURED_PATHS:
+        return
+    # lstat 1回で有無だけ見る（リンク先はたどらない）
+    if os.path.lexists(path):
+        _ENSURED_PATHS.add(path)
+        return
+    # 一時ファイル（名前は毎回別、権限は umask どおり）に書いてから、path へハードリンクで出す
+    # link は既にあれば FileExistsError になるので、同時に起動した別の工房が作った workspace を上書きしない
+    # （途中で落ちても、壊れた workspace.json は残らない）
     try:
-        safe_save_json(path, data)
-    except Exception:
-        # 最後の手段：素のjson
+        tmp = _write_temp(path, _DEFAULT_WORKSPACE_BYTES)
+    except OSError:
+        return  # 書けない場所（権限・容量・読み取り専用）なら諦める
+    try:
+        os.link(tmp, path)
+        _ENSURED_PATHS.add(path)
+    except FileExistsError:
+        _ENSURED_PATHS.add(path)
+    except OSError:
+        # ハードリンクが使えないファイルシステム（FAT など）では、無いときだけ作る open で直接書く
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, _FILE_MODE)
+        except FileExistsError:
+            _ENSURED_PATHS.add(path)
+        except OSError:
             pass
-
-def open_workshop_window(parent=None, workspace_path: str = "workspace.json", rules_pack_path: str = "rules_pack.json"):
-    """本体から呼び出す入口。parent があれば Toplevel、なければ単体起動。"""
-    ensure_workspace_file(workspace_path)
-    if parent is None:
-        root = tk.Tk()
-        root.withdraw()
-        WorkshopApp(root, workspace_path, rules_pack_path)
-        root.mainloop()
-    else:
+        else:
+            try:
+                os.write(fd, _DEFAULT_WORKSPACE_BYTES)
+            finally:
+                os.close(fd)
+            _ENSURED_PATHS.add(path)
+    finally:
+        _remove_quietly(tmp)
+
+def open_workshop_window(parent=None, workspace_path: str = "workspace.json", rules_pack_path: str = "rules_pack.json",
+                         *, skip_fs_check: bool = False):
+    """本体から呼び出す入口。parent があれば Toplevel、なければ単体起動。
+
+    workspace があるとわかっている呼び出し側は skip_fs_check=True で作成確認を省ける。
+    """
+    if not skip_fs_check:
         ensure_workspace_file(workspace_path)
-        return WorkshopApp(parent, workspace_path, rules_pack_path)
+    cls = StandaloneWorkshopApp if parent is None else WorkshopApp
+    app = cls(parent, workspace_path, rules_pack_path)
+    if parent is None:
+        app.mainloop()
+    return app
 
 def main():
     args = parse_args()